@@ -1,4 +1,5 @@
 """Application factory for BookShare Flask app."""
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -31,24 +32,22 @@ def create_app(config_name='default'):
     # Register blueprints
     from app.routes import books, borrowers, loans, dashboard, recommendations, admin
     
-    app.register_blueprint(dashboard.bp)
-    app.register_blueprint(books.bp)
-    app.register_blueprint(borrowers.bp)
-    app.register_blueprint(loans.bp)
-    app.register_blueprint(recommendations.bp)
-    app.register_blueprint(admin.bp)
+    for module in (dashboard, books, borrowers, loans, recommendations, admin):
+        app.register_blueprint(module.bp)
     
     # Register CLI commands
     from app.utils import cli
     cli.register_commands(app)
     
-    # Initialize scheduler for reminders (only in non-testing environments)
-    if not app.config.get('TESTING', False):
+    # Initialize scheduler for reminders (not in tests, nor on serverless hosts
+    # like Vercel where no background thread outlives the request)
+    if not app.config.get('TESTING', False) and not os.getenv('VERCEL'):
         from app.utils.scheduler_config import init_scheduler
         init_scheduler(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Create database tables (dev/testing only; deployments run `flask init-db`)
+    if app.config.get('AUTO_CREATE_TABLES'):
+        with app.app_context():
+            db.create_all()
     
     return app
@@ -1,6 +1,15 @@
 """Database models for BookShare application."""
 from datetime import datetime
+from sqlalchemy import DDL, event, func, literal_column, select, update
+from sqlalchemy.ext.hybrid import hybrid_property
+from flask import current_app
 from app import db
+from app.utils.cache import TTLCache
+
+# Sentinel distinguishing "not cached" from a cached missing setting
+_MISSING = object()
+
+_settings_cache = TTLCache(maxsize=256)
 
 
 class Book(db.Model):
@@ -15,9 +24,19 @@ class Book(db.Model):
     genre = db.Column(db.String(100), index=True)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalized from loans so availability is a column read; kept in sync
+    # by the Loan flush listeners below
+    active_loan_id = db.Column(
+        db.Integer,
+        db.ForeignKey('loans.id', use_alter=True, name='fk_books_active_loan_id', ondelete='SET NULL'),
+        unique=True
+    )
     
     # Relationships
-    loans = db.relationship('Loan', backref='book', lazy=True, cascade='all, delete-orphan')
+    # Write-only: callers query loans explicitly instead of loading the full history
+    loans = db.relationship('Loan', back_populates='book', lazy='write_only',
+                            cascade='all, delete-orphan', passive_deletes=True,
+                            foreign_keys='Loan.book_id')
     
     def __repr__(self):
         return f'<Book {self.title} by {self.author}>'
@@ -35,19 +54,82 @@ class Book(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
-    @property
+    @hybrid_property
+    def search_text(self):
+        """Title, author, ISBN and genre joined into one searchable string."""
+        return ' '.join([self.title, self.author, self.isbn or '', self.genre or ''])
+    
+    @search_text.expression
+    def search_text(cls):
+        """SQL form of search_text; must match the ix_books_search_trgm expression."""
+        separator, empty = literal_column("' '"), literal_column("''")
+        return (cls.title + separator + cls.author + separator
+                + func.coalesce(cls.isbn, empty) + separator + func.coalesce(cls.genre, empty))
+    
+    @hybrid_property
     def is_available(self):
         """Check if book is currently available (not on loan)."""
-        active_loan = Loan.query.filter_by(
-            book_id=self.id,
-            returned_at=None
-        ).first()
-        return active_loan is None
+        return self.active_loan_id is None
+    
+    @is_available.expression
+    def is_available(cls):
+        """SQL form of is_available, usable in filter/order_by/select."""
+        return cls.active_loan_id.is_(None)
+    
+    @classmethod
+    def with_availability(cls):
+        """Query books paired with their availability in a single SELECT.
+        
+        Returns:
+            Query yielding (book, available) tuples
+        """
+        return db.session.query(cls, cls.is_available.label('available'))
+    
+    @staticmethod
+    def sync_active_loans(commit=True):
+        """Recompute active_loan_id for every book from the loans table.
+        
+        Needed after writes that bypass the ORM flush listeners, such as
+        bulk inserts or loading an existing database.
+        
+        Args:
+            commit: Commit the session afterwards; pass False to keep the
+                update in the caller's transaction
+        """
+        active_loan = select(Loan.id).where(
+            Loan.book_id == Book.id,
+            Loan.returned_at.is_(None)
+        ).scalar_subquery()
+        db.session.execute(update(Book).values(active_loan_id=active_loan))
+        if commit:
+            db.session.commit()
+
+
+# The trigram indexes need the pg_trgm extension on Postgres
+PG_TRGM_DDL = DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+# One trigram index over Book.search_text serves every book search with a
+# single ILIKE probe instead of OR-ing one ILIKE per column
+BOOK_SEARCH_TRGM_DDL = DDL(
+    "CREATE INDEX IF NOT EXISTS ix_books_search_trgm ON books USING gin "
+    "((title || ' ' || author || ' ' || coalesce(isbn, '') || ' ' || coalesce(genre, '')) "
+    "gin_trgm_ops)"
+)
+
+# These only fire when create_all creates the books table; upgrade_schema in
+# app/utils/cli.py runs them for databases where it already exists
+event.listen(Book.__table__, 'before_create', PG_TRGM_DDL.execute_if(dialect='postgresql'))
+event.listen(Book.__table__, 'after_create', BOOK_SEARCH_TRGM_DDL.execute_if(dialect='postgresql'))
 
 
 class Borrower(db.Model):
     """Borrower/patron model."""
     __tablename__ = 'borrowers'
+    __table_args__ = tuple(
+        db.Index(f'ix_borrowers_{column}_trgm', column, postgresql_using='gin',
+                 postgresql_ops={column: 'gin_trgm_ops'}).ddl_if(dialect='postgresql')
+        for column in ('name', 'email')
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False, index=True)
@@ -56,7 +138,8 @@ class Borrower(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    loans = db.relationship('Loan', backref='borrower', lazy=True, cascade='all, delete-orphan')
+    loans = db.relationship('Loan', back_populates='borrower', lazy='write_only',
+                            cascade='all, delete-orphan', passive_deletes=True)
     
     def __repr__(self):
         return f'<Borrower {self.name}>'
@@ -75,6 +158,17 @@ class Borrower(db.Model):
 class Loan(db.Model):
     """Loan transaction model."""
     __tablename__ = 'loans'
+    __table_args__ = (
+        # Covers only active loans: serves the reminder sweep, the active list
+        # and "returned_at IS NULL AND due_at < now" overdue lookups
+        db.Index('ix_loans_active_due', 'due_at',
+                 postgresql_where=db.text('returned_at IS NULL'),
+                 sqlite_where=db.text('returned_at IS NULL')),
+        # A book can have at most one active (unreturned) loan
+        db.Index('uniq_active_loan', 'book_id', unique=True,
+                 postgresql_where=db.text('returned_at IS NULL'),
+                 sqlite_where=db.text('returned_at IS NULL')),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False, index=True)
@@ -84,6 +178,8 @@ class Loan(db.Model):
     returned_at = db.Column(db.DateTime)
     
     # Relationships
+    book = db.relationship('Book', back_populates='loans', foreign_keys=[book_id])
+    borrower = db.relationship('Borrower', back_populates='loans')
     notifications = db.relationship('Notification', backref='loan', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
@@ -100,6 +196,23 @@ class Loan(db.Model):
             'returned_at': self.returned_at.isoformat() if self.returned_at else None
         }
     
+    @staticmethod
+    def active_counts_by_borrower(borrower_ids=None):
+        """Count active loans per borrower in a single grouped query.
+        
+        Args:
+            borrower_ids: Restrict to these borrowers (default: all)
+            
+        Returns:
+            Dict mapping borrower_id to number of active loans
+        """
+        query = db.session.query(Loan.borrower_id, func.count(Loan.id)).filter(
+            Loan.returned_at.is_(None)
+        )
+        if borrower_ids is not None:
+            query = query.filter(Loan.borrower_id.in_(borrower_ids))
+        return dict(query.group_by(Loan.borrower_id).all())
+    
     @property
     def is_overdue(self):
         """Check if loan is overdue."""
@@ -108,12 +221,39 @@ class Loan(db.Model):
         return datetime.utcnow() > self.due_at
 
 
+def _set_book_active_loan(mapper, connection, loan):
+    """Point a newly inserted active loan's book at it."""
+    if loan.returned_at is None:
+        books = Book.__table__
+        connection.execute(
+            books.update().where(books.c.id == loan.book_id).values(active_loan_id=loan.id)
+        )
+
+
+def _clear_book_active_loan(mapper, connection, loan):
+    """Free the book once its active loan is returned."""
+    if loan.returned_at is not None and db.inspect(loan).attrs.returned_at.history.has_changes():
+        books = Book.__table__
+        connection.execute(
+            books.update().where(books.c.active_loan_id == loan.id).values(active_loan_id=None)
+        )
+
+
+event.listen(Loan, 'after_insert', _set_book_active_loan)
+event.listen(Loan, 'after_update', _clear_book_active_loan)
+
+
 class Notification(db.Model):
     """Email notification tracking."""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Serves the per-loan "already sent?" reminder checks; loan_id leads,
+        # so it also covers plain loan_id lookups
+        db.Index('ix_notifications_loan_kind_status', 'loan_id', 'kind', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    loan_id = db.Column(db.Integer, db.ForeignKey('loans.id'), nullable=False, index=True)
+    loan_id = db.Column(db.Integer, db.ForeignKey('loans.id'), nullable=False)
     kind = db.Column(db.String(50), nullable=False)  # 'before_due', 'on_due', 'after_due'
     scheduled_at = db.Column(db.DateTime, nullable=False, index=True)
     sent_at = db.Column(db.DateTime)
@@ -147,9 +287,13 @@ class Setting(db.Model):
     
     @staticmethod
     def get_value(key, default=None):
-        """Get setting value by key."""
-        setting = Setting.query.filter_by(key=key).first()
-        return setting.value if setting else default
+        """Get setting value by key, cached in-process for SETTINGS_CACHE_TTL seconds."""
+        value = _settings_cache.get(key, _MISSING)
+        if value is _MISSING:
+            setting = Setting.query.filter_by(key=key).first()
+            value = setting.value if setting else None
+            _settings_cache.set(key, value, current_app.config.get('SETTINGS_CACHE_TTL', 60))
+        return default if value is None else value
     
     @staticmethod
     def set_value(key, value):
@@ -161,3 +305,5 @@ class Setting(db.Model):
             setting = Setting(key=key, value=value)
             db.session.add(setting)
         db.session.commit()
+        # Other workers pick up the change once their cached entry expires
+        _settings_cache.delete(key)
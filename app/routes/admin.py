@@ -1,34 +1,35 @@
 """Admin blueprint for system management."""
-from flask import Blueprint, render_template, redirect, url_for, flash, current_app, send_file, request
+from flask import (
+    Blueprint, render_template, redirect, url_for, flash, current_app, request,
+    Response, stream_with_context
+)
 from app.models import Book, Borrower, Loan, db
+from app.services.stats import get_library_stats
 from datetime import datetime
-import csv
-import io
+from sqlalchemy.orm import selectinload, raiseload
 from werkzeug.utils import secure_filename
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+# Rows fetched per round-trip when streaming CSV exports
+EXPORT_BATCH_SIZE = 500
+
+# Rows sent per multi-row INSERT when importing CSV files
+IMPORT_BATCH_SIZE = 1000
+
+# Largest CSV import accepted, in data rows
+IMPORT_MAX_ROWS = 50_000
+
 
 @bp.route('/')
 def dashboard():
     """Admin dashboard."""
     # Get statistics
-    total_books = Book.query.count()
-    total_borrowers = Borrower.query.count()
-    active_loans = Loan.query.filter_by(returned_at=None).count()
-    overdue_loans = Loan.query.filter(
-        Loan.returned_at.is_(None),
-        Loan.due_at < datetime.utcnow()
-    ).count()
-    
-    context = {
-        'total_books': total_books,
-        'total_borrowers': total_borrowers,
-        'active_loans': active_loans,
-        'overdue_loans': overdue_loans,
+    context = get_library_stats()
+    context.update({
         'reminder_before': current_app.config.get('REMINDER_BEFORE_DUE', 3),
         'reminder_after': current_app.config.get('REMINDER_AFTER_DUE', 3)
-    }
+    })
     
     return render_template('admin/dashboard.html', **context)
 
@@ -59,57 +60,74 @@ def export_data(data_type):
         flash('Invalid export type', 'error')
         return redirect(url_for('admin.dashboard'))
     
-    # Create CSV in memory
-    output = io.StringIO()
+    import csv
+    import io
+    import itertools
     
     if data_type == 'books':
-        books = Book.query.all()
-        writer = csv.writer(output)
-        writer.writerow(['ID', 'Title', 'Author', 'ISBN', 'Genre', 'Year', 'Description', 'Available'])
-        for book in books:
-            writer.writerow([
+        header = ['ID', 'Title', 'Author', 'ISBN', 'Genre', 'Year', 'Description', 'Available']
+        rows = (
+            [
                 book.id, book.title, book.author, book.isbn or '',
                 book.genre or '', book.year or '', book.description or '',
-                'Yes' if book.is_available else 'No'
-            ])
+                'Yes' if available else 'No'
+            ]
+            for book, available in Book.with_availability().yield_per(EXPORT_BATCH_SIZE)
+        )
     
     elif data_type == 'borrowers':
-        borrowers = Borrower.query.all()
-        writer = csv.writer(output)
-        writer.writerow(['ID', 'Name', 'Email', 'Phone', 'Created At'])
-        for borrower in borrowers:
-            writer.writerow([
+        header = ['ID', 'Name', 'Email', 'Phone', 'Created At']
+        rows = (
+            [
                 borrower.id, borrower.name, borrower.email,
                 borrower.phone or '', borrower.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
+            ]
+            for borrower in Borrower.query.yield_per(EXPORT_BATCH_SIZE)
+        )
     
     elif data_type == 'loans':
-        loans = Loan.query.all()
-        writer = csv.writer(output)
-        writer.writerow(['ID', 'Book Title', 'Borrower Name', 'Borrowed At', 'Due At', 'Returned At', 'Status'])
-        for loan in loans:
-            status = 'Returned' if loan.returned_at else ('Overdue' if loan.due_at < datetime.utcnow() else 'Active')
-            writer.writerow([
+        loans = Loan.query.options(
+            selectinload(Loan.book),
+            selectinload(Loan.borrower),
+            raiseload('*')
+        ).yield_per(EXPORT_BATCH_SIZE)
+        now = datetime.utcnow()
+        header = ['ID', 'Book Title', 'Borrower Name', 'Borrowed At', 'Due At', 'Returned At', 'Status']
+        rows = (
+            [
                 loan.id, loan.book.title, loan.borrower.name,
-                loan.borrowed_at.strftime('%Y-%m-%d %H:%M:%S'),
+                loan.loaned_at.strftime('%Y-%m-%d %H:%M:%S'),
                 loan.due_at.strftime('%Y-%m-%d %H:%M:%S'),
                 loan.returned_at.strftime('%Y-%m-%d %H:%M:%S') if loan.returned_at else '',
-                status
-            ])
+                'Returned' if loan.returned_at else ('Overdue' if loan.due_at < now else 'Active')
+            ]
+            for loan in loans
+        )
     
-    # Prepare file for download
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+    def generate():
+        """Yield the CSV one row at a time so memory stays constant."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in itertools.chain([header], rows):
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    filename = f'{data_type}_export_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.csv'
+    return Response(
+        stream_with_context(generate()),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'{data_type}_export_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.csv'
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
 
 @bp.route('/import/books', methods=['POST'])
 def import_books():
     """Import books from CSV file."""
+    import csv
+    import io
+    
     if 'file' not in request.files:
         flash('No file uploaded', 'error')
         return redirect(url_for('admin.dashboard'))
@@ -124,34 +142,43 @@ def import_books():
         return redirect(url_for('admin.dashboard'))
     
     try:
-        # Read CSV
-        stream = io.StringIO(file.stream.read().decode('UTF8'), newline=None)
+        # Parse the upload as it streams in rather than reading it into memory
+        stream = io.TextIOWrapper(file.stream, encoding='utf-8', newline='')
         reader = csv.DictReader(stream)
         
         imported = 0
         errors = []
+        batch = []
         
         for row_num, row in enumerate(reader, start=2):  # Start at 2 because row 1 is header
+            if row_num - 1 > IMPORT_MAX_ROWS:
+                raise ValueError(f'file has more than {IMPORT_MAX_ROWS} rows')
+            
             try:
                 # Validate required fields
                 if not row.get('Title') or not row.get('Author'):
                     errors.append(f"Row {row_num}: Title and Author are required")
                     continue
                 
-                # Create book
-                book = Book(
-                    title=row['Title'].strip(),
-                    author=row['Author'].strip(),
-                    isbn=row.get('ISBN', '').strip() or None,
-                    genre=row.get('Genre', '').strip() or None,
-                    year=int(row['Year']) if row.get('Year', '').strip() else None,
-                    description=row.get('Description', '').strip() or None
-                )
-                db.session.add(book)
+                batch.append({
+                    'title': row['Title'].strip(),
+                    'author': row['Author'].strip(),
+                    'isbn': row.get('ISBN', '').strip() or None,
+                    'genre': row.get('Genre', '').strip() or None,
+                    'year': int(row['Year']) if row.get('Year', '').strip() else None,
+                    'description': row.get('Description', '').strip() or None
+                })
                 imported += 1
             except Exception as e:
                 errors.append(f"Row {row_num}: {str(e)}")
+            
+            # Insert in multi-row batches rather than one INSERT per book
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                db.session.execute(Book.__table__.insert(), batch)
+                batch = []
         
+        if batch:
+            db.session.execute(Book.__table__.insert(), batch)
         db.session.commit()
         
         # Show results
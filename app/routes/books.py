@@ -1,30 +1,36 @@
 """Books blueprint."""
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app
 from app import db
-from app.models import Book
-from sqlalchemy import or_
+from app.models import Book, Loan, Notification
+from app.utils.cache import TTLCache
 
 bp = Blueprint('books', __name__, url_prefix='/books')
 
+_autocomplete_cache = TTLCache(maxsize=1024)
+
 
 @bp.route('/')
 def list_books():
     """List all books with optional search."""
     query = request.args.get('q', '')
+    page = request.args.get('page', 1, type=int)
     
+    books_query = Book.query
     if query:
-        books = Book.query.filter(
-            or_(
-                Book.title.ilike(f'%{query}%'),
-                Book.author.ilike(f'%{query}%'),
-                Book.isbn.ilike(f'%{query}%'),
-                Book.genre.ilike(f'%{query}%')
-            )
-        ).all()
-    else:
-        books = Book.query.all()
+        books_query = books_query.filter(Book.search_text.ilike(f'%{query}%'))
+    
+    pagination = books_query.order_by(Book.id).paginate(
+        page=page,
+        per_page=current_app.config.get('ITEMS_PER_PAGE', 50),
+        error_out=False
+    )
     
-    return render_template('books/list.html', books=books, query=query)
+    return render_template(
+        'books/list.html',
+        books=pagination.items,
+        pagination=pagination,
+        query=query
+    )
 
 
 @bp.route('/<int:book_id>')
@@ -76,9 +82,11 @@ def create():
         
         # Rebuild recommendation cache in background
         try:
-            from app.services.recommendations import rebuild_recommendation_cache
-            rebuild_recommendation_cache()
-            current_app.logger.info('Recommendation cache rebuilt after book creation')
+            from app.utils.scheduler_config import schedule_recommendation_rebuild
+            if schedule_recommendation_rebuild():
+                current_app.logger.info('Recommendation cache rebuild queued after book creation')
+            else:
+                current_app.logger.info('Recommendation engine reset after book creation')
         except Exception as e:
             current_app.logger.error(f'Failed to rebuild recommendation cache: {e}')
         
@@ -105,9 +113,11 @@ def edit(book_id):
         
         # Rebuild recommendation cache in background
         try:
-            from app.services.recommendations import rebuild_recommendation_cache
-            rebuild_recommendation_cache()
-            current_app.logger.info('Recommendation cache rebuilt after book update')
+            from app.utils.scheduler_config import schedule_recommendation_rebuild
+            if schedule_recommendation_rebuild():
+                current_app.logger.info('Recommendation cache rebuild queued after book update')
+            else:
+                current_app.logger.info('Recommendation engine reset after book update')
         except Exception as e:
             current_app.logger.error(f'Failed to rebuild recommendation cache: {e}')
         
@@ -121,14 +131,23 @@ def edit(book_id):
 def delete(book_id):
     """Delete a book."""
     book = Book.query.get_or_404(book_id)
+    
+    # Book.loans is write-only, so remove its loans and their notifications in bulk
+    loan_ids = db.session.query(Loan.id).filter(Loan.book_id == book.id)
+    Notification.query.filter(Notification.loan_id.in_(loan_ids.scalar_subquery())).delete(
+        synchronize_session=False
+    )
+    Loan.query.filter_by(book_id=book.id).delete(synchronize_session=False)
     db.session.delete(book)
     db.session.commit()
     
     # Rebuild recommendation cache in background
     try:
-        from app.services.recommendations import rebuild_recommendation_cache
-        rebuild_recommendation_cache()
-        current_app.logger.info('Recommendation cache rebuilt after book deletion')
+        from app.utils.scheduler_config import schedule_recommendation_rebuild
+        if schedule_recommendation_rebuild():
+            current_app.logger.info('Recommendation cache rebuild queued after book deletion')
+        else:
+            current_app.logger.info('Recommendation engine reset after book deletion')
     except Exception as e:
         current_app.logger.error(f'Failed to rebuild recommendation cache: {e}')
     
@@ -142,89 +161,41 @@ def api_search():
     """Search books API endpoint."""
     query = request.args.get('q', '')
     
-    books = Book.query.filter(
-        or_(
-            Book.title.ilike(f'%{query}%'),
-            Book.author.ilike(f'%{query}%'),
-            Book.isbn.ilike(f'%{query}%')
-        )
-    ).limit(10).all()
+    books = Book.query.filter(Book.search_text.ilike(f'%{query}%')).limit(10).all()
     
     return jsonify([book.to_dict() for book in books])
 
 
 @bp.route('/api/autocomplete')
 def api_autocomplete():
-    """Autocomplete API endpoint with search history and live results."""
-    from flask import session
+    """Autocomplete API endpoint with live results.
     
-    query = request.args.get('q', '').strip()
+    Search history is kept in the browser's localStorage, so this endpoint
+    only returns matching books.
+    """
+    # Normalize so equivalent prefixes share a cache entry
+    query = request.args.get('q', '').strip().lower()[:50]
     
-    # Get search history from session
-    search_history = session.get('book_search_history', [])
+    results = _autocomplete_books(query) if query else []
     
-    # Get matching books if query is provided
-    results = []
-    if query:
-        books = Book.query.filter(
-            or_(
-                Book.title.ilike(f'%{query}%'),
-                Book.author.ilike(f'%{query}%'),
-                Book.genre.ilike(f'%{query}%')
-            )
-        ).limit(8).all()
-        
-        results = [{
-            'id': book.id,
-            'title': book.title,
-            'author': book.author,
-            'genre': book.genre,
-            'is_available': book.is_available
-        } for book in books]
-    
-    return jsonify({
-        'history': search_history[-5:],  # Last 5 searches
-        'results': results
-    })
+    return jsonify({'results': results})
 
 
-@bp.route('/api/history', methods=['POST'])
-def api_save_history():
-    """Save search query to history."""
-    from flask import session
+def _autocomplete_books(query):
+    """Get autocomplete matches for a normalized query, cached for a short TTL."""
+    results = _autocomplete_cache.get(query)
+    if results is not None:
+        return results
     
-    data = request.get_json()
-    query = data.get('query', '').strip()
-    
-    if query:
-        # Initialize history if not exists
-        if 'book_search_history' not in session:
-            session['book_search_history'] = []
-        
-        history = session['book_search_history']
-        
-        # Remove duplicate if exists
-        if query in history:
-            history.remove(query)
-        
-        # Add to front of history
-        history.insert(0, query)
-        
-        # Keep only last 10 searches
-        session['book_search_history'] = history[:10]
-        
-        # Mark session as modified
-        session.modified = True
-    
-    return jsonify({'success': True})
-
-
-@bp.route('/api/history', methods=['DELETE'])
-def api_clear_history():
-    """Clear search history."""
-    from flask import session
+    books = Book.query.filter(Book.search_text.ilike(f'%{query}%')).limit(8).all()
     
-    session.pop('book_search_history', None)
-    session.modified = True
+    results = [{
+        'id': book.id,
+        'title': book.title,
+        'author': book.author,
+        'genre': book.genre,
+        'is_available': book.is_available
+    } for book in books]
     
-    return jsonify({'success': True})
+    _autocomplete_cache.set(query, results, current_app.config.get('AUTOCOMPLETE_CACHE_TTL', 30))
+    return results
@@ -1,23 +1,62 @@
 """Borrowers blueprint."""
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 from app import db
-from app.models import Borrower
+from app.models import Borrower, Loan
 
 bp = Blueprint('borrowers', __name__, url_prefix='/borrowers')
 
+# Most recent loans shown on the borrower detail page
+LOAN_HISTORY_LIMIT = 50
+
 
 @bp.route('/')
 def list_borrowers():
     """List all borrowers."""
-    borrowers = Borrower.query.all()
-    return render_template('borrowers/list.html', borrowers=borrowers)
+    page = request.args.get('page', 1, type=int)
+    pagination = Borrower.query.order_by(Borrower.id).paginate(
+        page=page,
+        per_page=current_app.config.get('ITEMS_PER_PAGE', 50),
+        error_out=False
+    )
+    active_borrowers = db.session.query(func.count(func.distinct(Loan.borrower_id))).scalar()
+    active_loan_counts = Loan.active_counts_by_borrower([b.id for b in pagination.items])
+    
+    return render_template(
+        'borrowers/list.html',
+        borrowers=pagination.items,
+        pagination=pagination,
+        active_borrowers=active_borrowers,
+        active_loan_counts=active_loan_counts
+    )
 
 
 @bp.route('/<int:borrower_id>')
 def detail(borrower_id):
     """Borrower detail page with loan history."""
     borrower = Borrower.query.get_or_404(borrower_id)
-    return render_template('borrowers/detail.html', borrower=borrower)
+    
+    # Show only the most recent loans; totals come from one aggregate query
+    loans = db.session.scalars(
+        borrower.loans.select()
+        .options(selectinload(Loan.book))
+        .order_by(Loan.loaned_at.desc())
+        .limit(LOAN_HISTORY_LIMIT)
+    ).all()
+    total_loans, returned_loans = db.session.query(
+        func.count(Loan.id),
+        func.count(Loan.returned_at)
+    ).filter(Loan.borrower_id == borrower.id).one()
+    
+    return render_template(
+        'borrowers/detail.html',
+        borrower=borrower,
+        loans=loans,
+        total_loans=total_loans,
+        active_loans=total_loans - returned_loans,
+        returned_loans=returned_loans
+    )
 
 
 @bp.route('/new', methods=['GET', 'POST'])
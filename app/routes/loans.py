@@ -1,8 +1,10 @@
 """Loans blueprint."""
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from app import db
 from app.models import Loan, Book, Borrower
 from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, raiseload
 
 bp = Blueprint('loans', __name__, url_prefix='/loans')
 
@@ -11,18 +13,37 @@ bp = Blueprint('loans', __name__, url_prefix='/loans')
 def list_loans():
     """List all loans with optional filters."""
     filter_type = request.args.get('filter', 'active')
+    page = request.args.get('page', 1, type=int)
+    
+    # Batch-load related books and borrowers instead of one lazy SELECT per row
+    query = Loan.query.options(
+        selectinload(Loan.book),
+        selectinload(Loan.borrower),
+        raiseload('*')
+    )
     
     if filter_type == 'overdue':
-        loans = Loan.query.filter(
+        query = query.filter(
             Loan.returned_at.is_(None),
             Loan.due_at < datetime.utcnow()
-        ).all()
+        )
     elif filter_type == 'returned':
-        loans = Loan.query.filter(Loan.returned_at.isnot(None)).all()
+        query = query.filter(Loan.returned_at.isnot(None))
     else:  # active
-        loans = Loan.query.filter_by(returned_at=None).all()
+        query = query.filter_by(returned_at=None)
     
-    return render_template('loans/list.html', loans=loans, filter_type=filter_type)
+    pagination = query.order_by(Loan.id).paginate(
+        page=page,
+        per_page=current_app.config.get('ITEMS_PER_PAGE', 50),
+        error_out=False
+    )
+    
+    return render_template(
+        'loans/list.html',
+        loans=pagination.items,
+        pagination=pagination,
+        filter_type=filter_type
+    )
 
 
 @bp.route('/new', methods=['GET', 'POST'])
@@ -33,30 +54,29 @@ def create():
         borrower_id = request.form.get('borrower_id', type=int)
         due_days = request.form.get('due_days', 14, type=int)
         
-        # Explicit check: Prevent duplicate active loans for the same book
-        existing_loan = Loan.query.filter_by(
-            book_id=book_id,
-            returned_at=None
-        ).first()
-        
-        if existing_loan:
-            flash('This book is already on loan and must be returned first!', 'error')
+        if not book_id or not borrower_id:
+            flash('Please select a book and a borrower!', 'error')
             return redirect(url_for('loans.create'))
         
-        # Double-check book availability
-        book = Book.query.get_or_404(book_id)
-        if not book.is_available:
-            flash('This book is not available for loan!', 'error')
-            return redirect(url_for('loans.create'))
+        # SQLite does not enforce foreign keys, so check both rows exist
+        db.get_or_404(Book, book_id)
+        db.get_or_404(Borrower, borrower_id)
         
-        # Create loan
+        # The uniq_active_loan index rejects a second active loan for the same book
         loan = Loan(
             book_id=book_id,
             borrower_id=borrower_id,
             due_at=datetime.utcnow() + timedelta(days=due_days)
         )
         db.session.add(loan)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not _is_active_loan_conflict(e):
+                raise
+            flash('This book is already on loan and must be returned first!', 'error')
+            return redirect(url_for('loans.create'))
         
         # Schedule notifications
         from app.services.scheduler import ReminderScheduler
@@ -68,7 +88,13 @@ def create():
     # GET request
     books = Book.query.all()
     borrowers = Borrower.query.all()
-    return render_template('loans/form.html', books=books, borrowers=borrowers)
+    active_loan_counts = Loan.active_counts_by_borrower()
+    return render_template(
+        'loans/form.html',
+        books=books,
+        borrowers=borrowers,
+        active_loan_counts=active_loan_counts
+    )
 
 
 @bp.route('/<int:loan_id>/return', methods=['POST'])
@@ -84,3 +110,20 @@ def return_loan(loan_id):
         flash('Loan returned successfully!', 'success')
     
     return redirect(url_for('loans.list_loans'))
+
+
+def _is_active_loan_conflict(error):
+    """Check whether an IntegrityError came from the uniq_active_loan index.
+    
+    Args:
+        error: IntegrityError raised while inserting a loan
+        
+    Returns:
+        True if the book already has an active loan
+    """
+    # psycopg reports the violated constraint by name; SQLite only names the
+    # columns, and loans.book_id is unique solely through uniq_active_loan
+    diag = getattr(error.orig, 'diag', None)
+    if diag is not None:
+        return diag.constraint_name == 'uniq_active_loan'
+    return 'loans.book_id' in str(error.orig)
@@ -2,14 +2,17 @@
 from flask import Blueprint, jsonify, request, current_app
 from app.models import Book, Borrower
 from app.services.recommendations import get_recommendation_engine
+from app.utils.cache import TTLCache
 import time
 
 bp = Blueprint('recommendations', __name__, url_prefix='/recommendations')
 
+_response_cache = TTLCache(maxsize=1024)
+
 
 @bp.route('/books/<int:book_id>')
 def get_recommendations(book_id):
-    """Get AI-powered book recommendations using TF-IDF content-based filtering.
+    """Get AI-powered book recommendations by shared genre, author and keywords.
     
     Args:
         book_id: ID of the book to get recommendations for
@@ -22,37 +25,42 @@ def get_recommendations(book_id):
     """
     start_time = time.time()
     
-    # Verify book exists
-    book = Book.query.get_or_404(book_id)
-    
     # Get top_k from query params or config
     top_k = request.args.get('top', type=int) or \
             current_app.config.get('RECOMMENDATIONS_TOP_K', 3)
     
-    # Get recommendation engine and compute recommendations
+    # Responses only change when the engine is rebuilt, so key them by build
     engine = get_recommendation_engine()
-    recommendations = engine.get_recommendations(book_id, top_k=top_k)
+    cache_key = (book_id, top_k, engine.build_id)
     
-    # Fetch book details for recommendations
-    recommended_books = []
-    for rec_book_id, similarity_score in recommendations:
-        rec_book = Book.query.get(rec_book_id)
-        if rec_book:
-            book_data = rec_book.to_dict()
-            book_data['similarity_score'] = round(similarity_score, 4)
-            recommended_books.append(book_data)
+    payload = _response_cache.get(cache_key)
+    if payload is None:
+        # Verify book exists
+        book = Book.query.get_or_404(book_id)
+        
+        # Compute recommendations
+        recommendations = engine.get_recommendations(book_id, top_k=top_k)
+        
+        # Fetch book details for recommendations
+        recommended_books = _recommended_books(recommendations)
+        
+        payload = {
+            'book_id': book_id,
+            'book_title': book.title,
+            'recommendations': recommended_books,
+            'count': len(recommended_books),
+            'algorithm': 'Genre & Keyword Matching'
+        }
+        _response_cache.set(cache_key, payload,
+                            current_app.config.get('RECOMMENDATION_RESPONSE_CACHE_TTL', 300))
     
     # Calculate latency
     latency_ms = (time.time() - start_time) * 1000
     
-    return jsonify({
-        'book_id': book_id,
-        'book_title': book.title,
-        'recommendations': recommended_books,
-        'count': len(recommended_books),
-        'latency_ms': round(latency_ms, 2),
-        'algorithm': 'Genre & Keyword Matching'
-    })
+    response = jsonify({**payload, 'latency_ms': round(latency_ms, 2)})
+    # The ETag ignores latency_ms, so repeat requests get a 304 until a rebuild
+    response.set_etag(f'{engine.build_id}-{book_id}-{top_k}')
+    return response.make_conditional(request)
 
 
 @bp.route('/borrowers/<int:borrower_id>')
@@ -79,13 +87,7 @@ def get_borrower_recommendations(borrower_id):
     recommendations = engine.get_recommendations_for_borrower(borrower_id, top_k=top_k)
     
     # Fetch book details
-    recommended_books = []
-    for rec_book_id, similarity_score, source in recommendations:
-        rec_book = Book.query.get(rec_book_id)
-        if rec_book:
-            book_data = rec_book.to_dict()
-            book_data['similarity_score'] = round(similarity_score, 4)
-            recommended_books.append(book_data)
+    recommended_books = _recommended_books(recommendations)
     
     # Calculate latency
     latency_ms = (time.time() - start_time) * 1000
@@ -100,6 +102,28 @@ def get_borrower_recommendations(borrower_id):
     })
 
 
+def _recommended_books(recommendations):
+    """Load recommended books in one query and serialize them in ranked order.
+    
+    Args:
+        recommendations: Sequence of tuples starting with (book_id, similarity_score)
+        
+    Returns:
+        List of book dicts with a similarity_score key
+    """
+    ids = [rec[0] for rec in recommendations]
+    books = {book.id: book for book in Book.query.filter(Book.id.in_(ids)).all()}
+    
+    recommended_books = []
+    for rec_book_id, similarity_score, *_ in recommendations:
+        rec_book = books.get(rec_book_id)
+        if rec_book:
+            book_data = rec_book.to_dict()
+            book_data['similarity_score'] = round(similarity_score, 4)
+            recommended_books.append(book_data)
+    return recommended_books
+
+
 @bp.route('/rebuild', methods=['POST'])
 def rebuild_cache():
     """Manually rebuild the recommendation cache.
@@ -1,16 +1,66 @@
 """Email service for sending notifications."""
-from flask import current_app, render_template_string
+from flask import current_app
 from flask_mail import Message
 from app import mail
 from app.models import Loan, Notification
 from datetime import datetime
+from jinja2 import Template
+
+# Reminder bodies are parsed once at import rather than on every render.
+# They are plain text, so unlike render_template_string they don't HTML-escape.
+BEFORE_DUE_TEMPLATE = Template("""
+Hello {{ borrower_name }},
+
+This is a friendly reminder that your loan is due soon:
+
+Book: {{ book_title }}
+Author: {{ book_author }}
+Due Date: {{ due_date }}
+Days Remaining: {{ days_until }}
+
+Please remember to return the book by the due date to avoid overdue status.
+
+Thank you,
+BookShare Library Management System
+""")
+
+ON_DUE_TEMPLATE = Template("""
+Hello {{ borrower_name }},
+
+This is a reminder that your loan is due TODAY:
+
+Book: {{ book_title }}
+Author: {{ book_author }}
+Due Date: {{ due_date }}
+
+Please return the book today to avoid overdue status.
+
+Thank you,
+BookShare Library Management System
+""")
+
+OVERDUE_TEMPLATE = Template("""
+Hello {{ borrower_name }},
+
+This is an OVERDUE notice for:
+
+Book: {{ book_title }}
+Author: {{ book_author }}
+Due Date: {{ due_date }}
+Days Overdue: {{ days_overdue }}
+
+Please return this book as soon as possible.
+
+Thank you,
+BookShare Library Management System
+""")
 
 
 class EmailService:
     """Service for sending email notifications."""
     
     @staticmethod
-    def send_email(to, subject, body_text, body_html=None):
+    def send_email(to, subject, body_text, body_html=None, connection=None):
         """Send an email.
         
         Args:
@@ -18,6 +68,8 @@ class EmailService:
             subject: Email subject
             body_text: Plain text body
             body_html: HTML body (optional)
+            connection: Open Flask-Mail connection to reuse (optional;
+                a new SMTP connection is opened per message otherwise)
             
         Returns:
             True if sent successfully, False otherwise
@@ -30,7 +82,7 @@ class EmailService:
                 html=body_html
             )
             
-            mail.send(msg)
+            (connection or mail).send(msg)
             current_app.logger.info(f'Email sent to {to}: {subject}')
             return True
             
@@ -39,16 +91,40 @@ class EmailService:
             return False
     
     @staticmethod
-    def send_reminder(loan, reminder_type='on_due'):
+    def send_reminder(loan, reminder_type='on_due', connection=None):
         """Send a loan reminder email.
         
         Args:
             loan: Loan instance
             reminder_type: Type of reminder ('before_due', 'on_due', 'after_due')
+            connection: Open Flask-Mail connection to reuse (optional)
             
         Returns:
             True if sent successfully, False otherwise
         """
+        to, subject, body = EmailService.build_reminder(loan, reminder_type)
+        
+        # Send email
+        success = EmailService.send_email(
+            to=to,
+            subject=subject,
+            body_text=body,
+            connection=connection
+        )
+        
+        return success
+    
+    @staticmethod
+    def build_reminder(loan, reminder_type='on_due'):
+        """Render a loan reminder email without sending it.
+        
+        Args:
+            loan: Loan instance
+            reminder_type: Type of reminder ('before_due', 'on_due', 'after_due')
+            
+        Returns:
+            Tuple of (recipient, subject, body)
+        """
         borrower = loan.borrower
         book = loan.book
         
@@ -65,36 +141,12 @@ class EmailService:
             days_overdue = (datetime.utcnow() - loan.due_at).days
             body = EmailService._generate_overdue_email(loan, days_overdue)
         
-        # Send email
-        success = EmailService.send_email(
-            to=borrower.email,
-            subject=subject,
-            body_text=body
-        )
-        
-        return success
+        return borrower.email, subject, body
     
     @staticmethod
     def _generate_before_due_email(loan, days_until):
         """Generate email body for before-due reminder."""
-        template = """
-Hello {{ borrower_name }},
-
-This is a friendly reminder that your loan is due soon:
-
-Book: {{ book_title }}
-Author: {{ book_author }}
-Due Date: {{ due_date }}
-Days Remaining: {{ days_until }}
-
-Please remember to return the book by the due date to avoid overdue status.
-
-Thank you,
-BookShare Library Management System
-        """
-        
-        return render_template_string(
-            template,
+        return BEFORE_DUE_TEMPLATE.render(
             borrower_name=loan.borrower.name,
             book_title=loan.book.title,
             book_author=loan.book.author,
@@ -105,23 +157,7 @@ BookShare Library Management System
     @staticmethod
     def _generate_on_due_email(loan):
         """Generate email body for on-due reminder."""
-        template = """
-Hello {{ borrower_name }},
-
-This is a reminder that your loan is due TODAY:
-
-Book: {{ book_title }}
-Author: {{ book_author }}
-Due Date: {{ due_date }}
-
-Please return the book today to avoid overdue status.
-
-Thank you,
-BookShare Library Management System
-        """
-        
-        return render_template_string(
-            template,
+        return ON_DUE_TEMPLATE.render(
             borrower_name=loan.borrower.name,
             book_title=loan.book.title,
             book_author=loan.book.author,
@@ -131,24 +167,7 @@ BookShare Library Management System
     @staticmethod
     def _generate_overdue_email(loan, days_overdue):
         """Generate email body for overdue reminder."""
-        template = """
-Hello {{ borrower_name }},
-
-This is an OVERDUE notice for:
-
-Book: {{ book_title }}
-Author: {{ book_author }}
-Due Date: {{ due_date }}
-Days Overdue: {{ days_overdue }}
-
-Please return this book as soon as possible.
-
-Thank you,
-BookShare Library Management System
-        """
-        
-        return render_template_string(
-            template,
+        return OVERDUE_TEMPLATE.render(
             borrower_name=loan.borrower.name,
             book_title=loan.book.title,
             book_author=loan.book.author,
@@ -1,67 +1,116 @@
+from app import db
 from app.models import Book
-from flask import current_app
-from collections import Counter
+from array import array
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import chain
+import heapq
+import pickle
+import sys
+import uuid
+
+# Neighbors memoized per book, and the most any request gets, which keeps
+# the per-build memo at no more than this many entries per book
+NEIGHBORS_CACHED = 50
+
+# Distinct book contents whose keyword sets are kept across engine rebuilds
+FEATURE_CACHE_SIZE = 20000
+
+# Bump when the save_cache payload layout changes so stale files are ignored
+CACHE_FORMAT_VERSION = 1
+
+
+# Keyed by the fields the keywords come from, so unchanged books are not
+# re-tokenized on rebuild and edited books miss the cache automatically
+@lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def _keywords_for(title, author, genre, description):
+    keywords = []
+    
+    if genre:
+        keywords.extend(genre.lower().split())
+    
+    if title:
+        title_words = [w.lower() for w in title.split() if len(w) > 3]
+        keywords.extend(title_words[:3])
+    
+    if author:
+        keywords.append(author.lower())
+    
+    if description:
+        desc_words = [w.lower() for w in description.split() if len(w) > 5]
+        keywords.extend(desc_words[:5])
+    
+    return frozenset(map(sys.intern, keywords))
 
 
 class RecommendationEngine:
     
     def __init__(self):
-        self.is_fitted = True
+        self.is_fitted = False
+        # Per-book features, stored as parallel lists indexed by position
+        self.book_ids = []
+        self.book_id_to_idx = {}
+        self.genres = []
+        self.authors = []
+        self.keyword_sets = []
+        self.keyword_index = defaultdict(list)
+        self.genre_index = defaultdict(list)
+        self.author_index = defaultdict(list)
+        # book_id -> [(book_id, score), ...] memoized per model build
+        self.top_neighbors = {}
+        self.build_id = None
     
     def _get_keywords(self, book):
-        keywords = []
-        
-        if book.genre:
-            keywords.extend(book.genre.lower().split())
-        
-        if book.title:
-            title_words = [w.lower() for w in book.title.split() if len(w) > 3]
-            keywords.extend(title_words[:3])
-        
-        if book.author:
-            keywords.append(book.author.lower())
-        
-        if book.description:
-            desc_words = [w.lower() for w in book.description.split() if len(w) > 5]
-            keywords.extend(desc_words[:5])
-        
-        return keywords
+        return _keywords_for(book.title, book.author, book.genre, book.description)
     
     def get_recommendations(self, book_id, top_k=3):
-        book = Book.query.get(book_id)
-        if not book:
+        # The model is never rebuilt in place: requests may be reading it. A
+        # book added since the last build has its rebuild queued already.
+        idx = self.book_id_to_idx.get(book_id)
+        if idx is None:
             return []
         
-        book_keywords = set(self._get_keywords(book))
+        # Neighbors only change when the model is rebuilt, so compute a
+        # generous list once per book and serve later requests by slicing it
+        neighbors = self.top_neighbors.get(book_id)
+        if neighbors is None:
+            neighbors = self._nearest_neighbors(idx, NEIGHBORS_CACHED)
+            self.top_neighbors[book_id] = neighbors
         
-        all_books = Book.query.filter(Book.id != book_id).all()
+        return neighbors[:min(top_k, NEIGHBORS_CACHED)]
+    
+    def _nearest_neighbors(self, idx, limit):
+        book_genre = self.genres[idx]
+        book_author = self.authors[idx]
         
-        scored_books = []
-        for other_book in all_books:
-            other_keywords = set(self._get_keywords(other_book))
-            
-            score = 0
-            
-            if book.genre and other_book.genre and book.genre.lower() == other_book.genre.lower():
-                score += 10
-            
-            common_keywords = book_keywords & other_keywords
-            score += len(common_keywords) * 2
-            
-            if book.author and other_book.author and book.author.lower() == other_book.author.lower():
-                score += 5
-            
-            if score > 0:
-                scored_books.append((other_book.id, score / 20.0))
+        # Only books sharing a keyword, genre or author can score above zero,
+        # so walk the inverted indexes instead of every book in the catalog.
+        # dict.fromkeys and Counter run their loops in C; only the (usually
+        # short) author and keyword hit lists are merged in Python.
+        scores = dict.fromkeys(self.genre_index[book_genre], 10) if book_genre else {}
+        
+        if book_author:
+            for other_idx in self.author_index[book_author]:
+                scores[other_idx] = scores.get(other_idx, 0) + 5
         
-        scored_books.sort(key=lambda x: x[1], reverse=True)
+        shared_keywords = Counter(chain.from_iterable(
+            self.keyword_index[keyword] for keyword in self.keyword_sets[idx]
+        ))
+        for other_idx, count in shared_keywords.items():
+            scores[other_idx] = scores.get(other_idx, 0) + 2 * count
         
-        return scored_books[:top_k]
+        scores.pop(idx, None)
+        
+        # Highest score first, catalog order among ties
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        
+        return [(self.book_ids[other_idx], score / 20.0) for other_idx, score in top]
     
     def get_recommendations_for_borrower(self, borrower_id, top_k=3):
         from app.models import Loan
+        from sqlalchemy.orm import joinedload
         
-        past_loans = Loan.query.filter_by(
+        past_loans = Loan.query.options(joinedload(Loan.book)).filter_by(
             borrower_id=borrower_id
         ).filter(
             Loan.returned_at.isnot(None)
@@ -79,35 +128,110 @@ class RecommendationEngine:
             if loan.book.author:
                 author_counter[loan.book.author.lower()] += 1
         
-        all_books = Book.query.all()
+        # Reuse the model's already-lowercased features instead of loading and
+        # normalizing every Book on each request
+        past_ids = {loan.book_id for loan in past_loans}
         
         scored_books = []
-        for book in all_books:
-            if any(loan.book_id == book.id for loan in past_loans):
+        for book_id, genre, author in zip(self.book_ids, self.genres, self.authors):
+            if book_id in past_ids:
                 continue
             
             score = 0
             
-            if book.genre:
-                score += genre_counter.get(book.genre.lower(), 0) * 5
+            if genre:
+                score += genre_counter.get(genre, 0) * 5
             
-            if book.author:
-                score += author_counter.get(book.author.lower(), 0) * 3
+            if author:
+                score += author_counter.get(author, 0) * 3
             
             if score > 0:
-                scored_books.append((book.id, score / 20.0, None))
-        
-        scored_books.sort(key=lambda x: x[1], reverse=True)
+                scored_books.append((book_id, score / 20.0, None))
         
-        return scored_books[:top_k]
+        # Partial selection: O(N log K) instead of sorting every scored book
+        return heapq.nlargest(top_k, scored_books, key=lambda x: x[1])
     
     def build_model(self, books=None):
-        pass
+        if books is None:
+            # Plain column rows avoid building a full ORM instance per book
+            books = db.session.query(
+                Book.id, Book.genre, Book.author, Book.title, Book.description
+            ).order_by(Book.id).all()
+        
+        self.book_ids = [book.id for book in books]
+        # Interning stores each distinct genre/author/keyword once, however many
+        # books share it, and makes index lookups compare by identity
+        self.genres = [sys.intern(book.genre.lower()) if book.genre else None for book in books]
+        self.authors = [sys.intern(book.author.lower()) if book.author else None for book in books]
+        self.keyword_sets = [self._get_keywords(book) for book in books]
+        
+        self._build_indexes()
+        # Changes on every build so callers can key caches by model version
+        self.build_id = uuid.uuid4().hex
+        self.is_fitted = True
+    
+    def _build_indexes(self):
+        self.book_id_to_idx = {book_id: idx for idx, book_id in enumerate(self.book_ids)}
+        
+        # Inverted indexes from each feature value to the positions that have it
+        self.keyword_index = defaultdict(list)
+        self.genre_index = defaultdict(list)
+        self.author_index = defaultdict(list)
+        for idx, keywords in enumerate(self.keyword_sets):
+            for keyword in keywords:
+                self.keyword_index[keyword].append(idx)
+            if self.genres[idx]:
+                self.genre_index[self.genres[idx]].append(idx)
+            if self.authors[idx]:
+                self.author_index[self.authors[idx]].append(idx)
+        
+        self.top_neighbors = {}
     
     def save_cache(self, cache_path='recommendations_cache.pkl'):
-        pass
+        # Store keyword sets CSR-style: each distinct keyword once, plus typed
+        # arrays of keyword numbers per book, which pickle as raw bytes
+        vocabulary = {}
+        indptr = array('I', [0])
+        indices = array('I')
+        for keywords in self.keyword_sets:
+            indices.extend(vocabulary.setdefault(keyword, len(vocabulary)) for keyword in keywords)
+            indptr.append(len(indices))
+        
+        payload = {
+            'version': CACHE_FORMAT_VERSION,
+            'build_id': self.build_id,
+            'book_ids': array('q', self.book_ids),
+            'genres': self.genres,
+            'authors': self.authors,
+            'vocabulary': list(vocabulary),
+            'indptr': indptr,
+            'indices': indices
+        }
+        with open(cache_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
     
     def load_cache(self, cache_path='recommendations_cache.pkl'):
+        try:
+            with open(cache_path, 'rb') as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        if payload.get('version') != CACHE_FORMAT_VERSION:
+            return False
+        
+        vocabulary = [sys.intern(keyword) for keyword in payload['vocabulary']]
+        indptr, indices = payload['indptr'], payload['indices']
+        
+        self.book_ids = list(payload['book_ids'])
+        self.genres = [sys.intern(genre) if genre else None for genre in payload['genres']]
+        self.authors = [sys.intern(author) if author else None for author in payload['authors']]
+        self.keyword_sets = [
+            frozenset(vocabulary[i] for i in indices[start:end])
+            for start, end in zip(indptr, indptr[1:])
+        ]
+        self._build_indexes()
+        self.build_id = payload['build_id']
+        self.is_fitted = True
         return True
 
 
@@ -115,15 +239,29 @@ _recommendation_engine = None
 
 
 def get_recommendation_engine():
-    global _recommendation_engine
+    # Only ever hand out fully built engines; see rebuild_recommendation_cache.
+    # Read the global once, as another request may reset it meanwhile
+    engine = _recommendation_engine
+    if engine is None:
+        engine = rebuild_recommendation_cache()
     
-    if _recommendation_engine is None:
-        _recommendation_engine = RecommendationEngine()
-    
-    return _recommendation_engine
+    return engine
+
+
+def reset_recommendation_engine():
+    global _recommendation_engine
+    # Dropped rather than rebuilt so the request that changed the catalog
+    # does not pay for build_model; the next get_recommendation_engine()
+    # call builds a fresh engine
+    _recommendation_engine = None
 
 
 def rebuild_recommendation_cache():
     global _recommendation_engine
-    _recommendation_engine = RecommendationEngine()
+    # Build before swapping so requests keep using the old model meanwhile
+    # (the scheduler runs this off the request path) instead of the first
+    # request after a rebuild paying for build_model
+    engine = RecommendationEngine()
+    engine.build_model()
+    _recommendation_engine = engine
     return _recommendation_engine
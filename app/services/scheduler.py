@@ -1,9 +1,15 @@
 """Reminder scheduler service using APScheduler."""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from flask import current_app
-from app import db
+from app import db, mail
 from app.models import Loan, Notification
 from app.services.email import EmailService
 from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
+
+# Active loans fetched per round-trip during a reminder run
+ACTIVE_LOAN_BATCH_SIZE = 500
 
 
 class ReminderScheduler:
@@ -28,20 +34,50 @@ class ReminderScheduler:
             'failed': 0
         }
         
-        # Find loans needing reminders
-        active_loans = Loan.query.filter_by(returned_at=None).all()
+        # Every reminder kind needs a loan due by the end of the before-due
+        # window, so loans due later are skipped in SQL (served by the
+        # partial ix_loans_active_due index) instead of checked one by one
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        due_cutoff = today + timedelta(days=days_before + 1)
+        candidates = (Loan.returned_at.is_(None), Loan.due_at < due_cutoff)
+        
+        # Find loans needing reminders, with the borrower and book each email uses,
+        # streamed in batches rather than materialized in one list
+        active_loans = Loan.query.options(
+            joinedload(Loan.borrower),
+            joinedload(Loan.book)
+        ).filter(*candidates).yield_per(ACTIVE_LOAN_BATCH_SIZE)
+        
+        # Fetch every already-sent reminder for these loans in one query
+        sent = set(db.session.query(Notification.loan_id, Notification.kind).filter(
+            Notification.status == 'sent',
+            Notification.loan_id.in_(db.session.query(Loan.id).filter(*candidates))
+        ).all())
         
+        # Render every due reminder here, so the sender threads below only
+        # talk SMTP and never touch the (thread-local) database session
+        reminders = []
         for loan in active_loans:
             notifications = ReminderScheduler._check_loan_notifications(
-                loan, days_before, days_after
+                loan, days_before, days_after, sent=sent
             )
             
             for notification_type in notifications:
-                success = ReminderScheduler._send_reminder(loan, notification_type)
-                if success:
-                    stats[notification_type] += 1
-                else:
-                    stats['failed'] += 1
+                to, subject, body = EmailService.build_reminder(loan, notification_type)
+                reminders.append((loan.id, notification_type, to, subject, body))
+        
+        results = ReminderScheduler._send_concurrently(reminders)
+        
+        pending = []
+        for (loan_id, notification_type, *_), success in zip(reminders, results):
+            pending.append(ReminderScheduler._build_notification(loan_id, notification_type, success))
+            if success:
+                stats[notification_type] += 1
+            else:
+                stats['failed'] += 1
+        
+        # One commit for the whole run instead of one per reminder
+        ReminderScheduler._record_notifications(pending)
         
         current_app.logger.info(
             f"Reminders processed: {stats['before_due']} before-due, "
@@ -52,13 +88,15 @@ class ReminderScheduler:
         return stats
     
     @staticmethod
-    def _check_loan_notifications(loan, days_before, days_after):
+    def _check_loan_notifications(loan, days_before, days_after, sent=None):
         """Check which notifications are needed for a loan.
         
         Args:
             loan: Loan instance
             days_before: Days before due to send reminder
             days_after: Days after due to send reminder
+            sent: Prefetched set of (loan_id, kind) pairs already sent
+                (optional; queried per notification type otherwise)
             
         Returns:
             List of notification types needed
@@ -66,6 +104,11 @@ class ReminderScheduler:
         needed = []
         now = datetime.utcnow()
         
+        def already_sent(kind):
+            if sent is None:
+                return ReminderScheduler._notification_sent(loan, kind)
+            return (loan.id, kind) in sent
+        
         # Calculate reminder dates
         before_due_date = loan.due_at - timedelta(days=days_before)
         on_due_date = loan.due_at
@@ -74,17 +117,17 @@ class ReminderScheduler:
         # Check if we need to send before-due reminder
         if (now.date() >= before_due_date.date() and 
             now.date() < on_due_date.date()):
-            if not ReminderScheduler._notification_sent(loan, 'before_due'):
+            if not already_sent('before_due'):
                 needed.append('before_due')
         
         # Check if we need to send on-due reminder
         if now.date() == on_due_date.date():
-            if not ReminderScheduler._notification_sent(loan, 'on_due'):
+            if not already_sent('on_due'):
                 needed.append('on_due')
         
         # Check if we need to send overdue reminder
         if now.date() >= after_due_date.date():
-            if not ReminderScheduler._notification_sent(loan, 'after_due'):
+            if not already_sent('after_due'):
                 needed.append('after_due')
         
         return needed
@@ -100,41 +143,121 @@ class ReminderScheduler:
         Returns:
             True if already sent, False otherwise
         """
-        existing = Notification.query.filter_by(
+        sent = Notification.query.filter_by(
             loan_id=loan.id,
             kind=kind,
             status='sent'
-        ).first()
+        ).exists()
         
-        return existing is not None
+        return db.session.query(sent).scalar()
     
     @staticmethod
-    def _send_reminder(loan, notification_type):
-        """Send a reminder and record the notification.
+    def _send_concurrently(reminders):
+        """Send rendered reminders from a pool of threads.
+        
+        SMTP sends are network-bound, so up to REMINDER_SEND_WORKERS threads
+        send in parallel, each over its own SMTP connection.
         
         Args:
-            loan: Loan instance
-            notification_type: Type of notification
+            reminders: List of (loan_id, kind, to, subject, body) tuples
             
         Returns:
-            True if successful, False otherwise
+            List of booleans, True where the matching reminder was sent
         """
-        # Send email
-        success = EmailService.send_reminder(loan, notification_type)
+        if not reminders:
+            return []
         
-        # Record notification
-        notification = Notification(
-            loan_id=loan.id,
+        workers = min(current_app.config.get('REMINDER_SEND_WORKERS', 8), len(reminders))
+        app = current_app._get_current_object()
+        
+        # Deal reminders out round-robin, one batch per worker
+        batches = [reminders[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batch_results = list(executor.map(
+                lambda batch: ReminderScheduler._send_batch(app, batch), batches
+            ))
+        
+        results = [False] * len(reminders)
+        for i, batch_result in enumerate(batch_results):
+            results[i::workers] = batch_result
+        return results
+    
+    @staticmethod
+    def _send_batch(app, reminders):
+        """Send reminders over a single SMTP connection (runs in a worker thread).
+        
+        A failed send usually leaves the connection dead, so it is reopened
+        before the next message rather than failing the rest of the batch.
+        
+        Args:
+            app: Flask application to push a context for
+            reminders: List of (loan_id, kind, to, subject, body) tuples
+            
+        Returns:
+            List of booleans, True where the matching reminder was sent
+        """
+        with app.app_context(), ExitStack() as stack:
+            connection = ReminderScheduler._open_connection(stack)
+            
+            results = []
+            for _, _, to, subject, body in reminders:
+                sent = EmailService.send_email(to, subject, body, connection=connection)
+                results.append(sent)
+                if not sent and connection is not None:
+                    try:
+                        stack.close()
+                    except Exception:
+                        pass  # QUIT on a dropped connection fails too
+                    connection = ReminderScheduler._open_connection(stack)
+            return results
+    
+    @staticmethod
+    def _open_connection(stack):
+        """Open an SMTP connection that closes with the given ExitStack.
+        
+        Args:
+            stack: ExitStack that owns the connection
+            
+        Returns:
+            Open Flask-Mail connection, or None to fall back to
+            per-message connections when it can't be opened
+        """
+        try:
+            return stack.enter_context(mail.connect())
+        except Exception as e:
+            current_app.logger.error(f'Could not open SMTP connection: {e}')
+            return None
+    
+    @staticmethod
+    def _build_notification(loan_id, notification_type, success):
+        """Build the record of a reminder send attempt.
+        
+        Args:
+            loan_id: ID of the loan the reminder was for
+            notification_type: Type of notification
+            success: Whether the email was sent
+            
+        Returns:
+            Unsaved Notification; pass it to _record_notifications to persist it
+        """
+        return Notification(
+            loan_id=loan_id,
             kind=notification_type,
             scheduled_at=datetime.utcnow(),
             sent_at=datetime.utcnow() if success else None,
             status='sent' if success else 'failed'
         )
+    
+    @staticmethod
+    def _record_notifications(notifications):
+        """Insert notification records in a single commit.
         
-        db.session.add(notification)
-        db.session.commit()
-        
-        return success
+        Args:
+            notifications: List of unsaved Notification instances
+        """
+        if notifications:
+            db.session.add_all(notifications)
+            db.session.commit()
     
     @staticmethod
     def schedule_notifications_for_loan(loan):
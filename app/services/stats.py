@@ -0,0 +1,42 @@
+"""Library statistics shown on the dashboards."""
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models import Book, Borrower, Loan
+from app.utils.cache import TTLCache
+
+
+_stats_cache = TTLCache(maxsize=1)
+
+
+def get_library_stats():
+    """Get book, borrower, and loan counts.
+    
+    All four counts are fetched in a single SELECT and cached in-process for
+    STATS_CACHE_TTL seconds, so repeated dashboard loads skip the database.
+    
+    Returns:
+        Dict with total_books, total_borrowers, active_loans, overdue_loans
+    """
+    cached = _stats_cache.get('stats')
+    if cached is not None:
+        return dict(cached)
+    
+    active = Loan.returned_at.is_(None)
+    total_books, total_borrowers, active_loans, overdue_loans = db.session.query(
+        select(func.count(Book.id)).scalar_subquery(),
+        select(func.count(Borrower.id)).scalar_subquery(),
+        select(func.count(Loan.id)).where(active).scalar_subquery(),
+        select(func.count(Loan.id)).where(active, Loan.due_at < datetime.utcnow()).scalar_subquery()
+    ).one()
+    
+    stats = {
+        'total_books': total_books,
+        'total_borrowers': total_borrowers,
+        'active_loans': active_loans,
+        'overdue_loans': overdue_loans
+    }
+    _stats_cache.set('stats', stats, current_app.config.get('STATS_CACHE_TTL', 30))
+    
+    return dict(stats)
@@ -0,0 +1,51 @@
+"""Small in-process caches for hot, slowly-changing data."""
+import threading
+import time
+
+
+class TTLCache:
+    """Thread-safe dict-backed cache whose entries expire after a TTL.
+    
+    Entries live only in the current process, so each worker keeps its own
+    copy; use it for data where a few seconds of staleness is acceptable.
+    """
+    
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """Get a cached value, or default if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return default
+        return entry[1]
+    
+    def set(self, key, value, ttl):
+        """Cache a value for ttl seconds (non-positive ttl disables caching)."""
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + ttl, value)
+    
+    def delete(self, key):
+        """Remove a single entry if present."""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+    
+    def _evict(self):
+        """Drop expired entries, or the oldest one if none have expired."""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at < now]
+        for key in expired:
+            del self._data[key]
+        if not expired:
+            del self._data[next(iter(self._data))]
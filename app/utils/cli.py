@@ -1,6 +1,8 @@
 """CLI commands for BookShare application."""
 import click
+from datetime import datetime
 from flask import current_app
+from sqlalchemy import and_, exists, inspect, or_, text, update
 from app import db
 
 
@@ -10,17 +12,22 @@ def register_commands(app):
     @app.cli.command('init-db')
     def init_db():
         """Initialize the database."""
+        from app.models import Book
         db.create_all()
+        upgrade_schema()
+        # Backfill the denormalized availability column for existing loans
+        Book.sync_active_loans()
         click.echo('Database initialized.')
     
     @app.cli.command('seed-db')
     @click.option('--books', default=1000, help='Number of books to seed')
     @click.option('--borrowers', default=50, help='Number of borrowers to seed')
     @click.option('--loans', default=200, help='Number of loans to seed')
-    def seed_db(books, borrowers, loans):
+    @click.option('--seed', type=int, default=None, help='Random seed for reproducible data')
+    def seed_db(books, borrowers, loans, seed):
         """Seed the database with sample data."""
         from scripts.seed import seed_data
-        seed_data(books, borrowers, loans)
+        seed_data(books, borrowers, loans, seed=seed)
         click.echo(f'Database seeded with {books} books, {borrowers} borrowers, {loans} loans.')
     
     @app.cli.command('rebuild-recs')
@@ -28,8 +35,11 @@ def register_commands(app):
         from app.services.recommendations import rebuild_recommendation_cache
         click.echo('Rebuilding recommendation cache...')
         engine = rebuild_recommendation_cache()
-        click.echo('✓ Recommendation engine ready (genre/keyword matching)')
-        click.echo('✓ No cache file needed for simple recommendations')
+        click.echo(f'✓ Recommendation engine ready with {len(engine.book_ids)} books')
+        # Saved so the demo and other processes can load instead of refitting
+        cache_path = current_app.config['RECOMMENDATION_CACHE_PATH']
+        engine.save_cache(cache_path)
+        click.echo(f'✓ Saved model to {cache_path}')
     
     @app.cli.command('test-email')
     def test_email():
@@ -53,3 +63,56 @@ def register_commands(app):
         click.echo(f"✓ Sent {stats['after_due']} overdue reminders")
         if stats['failed'] > 0:
             click.echo(f"✗ {stats['failed']} reminders failed", err=True)
+
+
+def upgrade_schema(engine=None):
+    """Add columns and indexes introduced since an existing database was created.
+    
+    db.create_all() only creates missing tables, so databases initialized by
+    an earlier release need these added in place. Safe to run repeatedly.
+    
+    Args:
+        engine: Engine to upgrade; defaults to the app's db.engine
+    """
+    from app.models import BOOK_SEARCH_TRGM_DDL, PG_TRGM_DDL, Loan
+    
+    engine = engine or db.engine
+    book_columns = {column['name'] for column in inspect(engine).get_columns('books')}
+    
+    with engine.begin() as connection:
+        if 'active_loan_id' not in book_columns:
+            connection.execute(text(
+                'ALTER TABLE books ADD COLUMN active_loan_id INTEGER '
+                'CONSTRAINT fk_books_active_loan_id REFERENCES loans (id) ON DELETE SET NULL'
+            ))
+            connection.execute(text(
+                'CREATE UNIQUE INDEX books_active_loan_id_key ON books (active_loan_id)'
+            ))
+        
+        # Earlier releases could put a book on two active loans, which would
+        # fail uniq_active_loan; keep the newest one and return the rest
+        loans = Loan.__table__
+        newer = loans.alias('newer')
+        connection.execute(
+            update(loans).where(
+                loans.c.returned_at.is_(None),
+                exists().where(
+                    newer.c.book_id == loans.c.book_id,
+                    newer.c.returned_at.is_(None),
+                    or_(
+                        newer.c.loaned_at > loans.c.loaned_at,
+                        and_(newer.c.loaned_at == loans.c.loaned_at, newer.c.id > loans.c.id)
+                    )
+                )
+            ).values(returned_at=datetime.utcnow())
+        )
+        
+        # The books table's create events only fire for a new table, so the
+        # trigram extension and search index are added here for existing ones
+        if connection.dialect.name == 'postgresql':
+            connection.execute(PG_TRGM_DDL)
+            connection.execute(BOOK_SEARCH_TRGM_DDL)
+        
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
@@ -1,12 +1,19 @@
 """APScheduler configuration and job definitions."""
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+from datetime import datetime, timedelta
 from flask import current_app
 
 
 # Global scheduler instance
 scheduler = None
 
+# Collapse missed runs into one, never overlap a job with itself, and still
+# run a job that was delayed by up to an hour (e.g. by a restart or busy pool)
+JOB_DEFAULTS = {
+    'coalesce': True,
+    'max_instances': 1,
+    'misfire_grace_time': 3600
+}
+
 
 def init_scheduler(app):
     """Initialize the APScheduler with the Flask app.
@@ -19,13 +26,19 @@ def init_scheduler(app):
     if scheduler is not None:
         return scheduler
     
-    scheduler = BackgroundScheduler()
+    # Imported here so CLI commands, tests and inline rebuilds, which never
+    # start the scheduler, skip APScheduler's import cost
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    
+    scheduler = BackgroundScheduler(job_defaults=JOB_DEFAULTS)
     
     # Add reminder processing job
     # Run every day at 9:00 AM
     scheduler.add_job(
         func=process_reminders_job,
         trigger=CronTrigger(hour=9, minute=0),
+        args=[app],
         id='process_reminders',
         name='Process loan reminders',
         replace_existing=True
@@ -42,16 +55,17 @@ def init_scheduler(app):
     return scheduler
 
 
-def process_reminders_job():
+def process_reminders_job(app):
     """Job function to process reminders.
     
-    This runs in a separate thread, so we need to create an app context.
+    This runs in a separate thread, so it pushes a context for the app that
+    started the scheduler rather than building a new app on every run.
+    
+    Args:
+        app: Flask application instance that started the scheduler
     """
-    from app import create_app
     from app.services.scheduler import ReminderScheduler
     
-    app = create_app()
-    
     with app.app_context():
         try:
             stats = ReminderScheduler.process_reminders()
@@ -60,6 +74,53 @@ def process_reminders_job():
             app.logger.error(f'Reminder job failed: {e}')
 
 
+def schedule_recommendation_rebuild():
+    """Queue a recommendation cache rebuild on the background scheduler.
+    
+    The job is delayed by RECOMMENDATION_REBUILD_DELAY seconds and replaces
+    any pending rebuild, so a burst of book edits triggers a single rebuild.
+    When the scheduler is not running (e.g. on Vercel, in tests or CLI
+    commands) the engine is only reset, and the next recommendation
+    request rebuilds it, so the calling request never runs build_model.
+    
+    Returns:
+        True if the rebuild was queued, False if the engine was reset instead
+    """
+    if scheduler is None or not scheduler.running:
+        from app.services.recommendations import reset_recommendation_engine
+        reset_recommendation_engine()
+        return False
+    
+    from apscheduler.triggers.date import DateTrigger
+    
+    delay = current_app.config.get('RECOMMENDATION_REBUILD_DELAY', 5)
+    scheduler.add_job(
+        func=rebuild_recommendations_job,
+        trigger=DateTrigger(run_date=datetime.now() + timedelta(seconds=delay)),
+        args=[current_app._get_current_object()],
+        id='rebuild_recommendations',
+        name='Rebuild recommendation cache',
+        replace_existing=True
+    )
+    return True
+
+
+def rebuild_recommendations_job(app):
+    """Job function to rebuild the recommendation cache.
+    
+    Args:
+        app: Flask application instance that queued the rebuild
+    """
+    from app.services.recommendations import rebuild_recommendation_cache
+    
+    with app.app_context():
+        try:
+            rebuild_recommendation_cache()
+            app.logger.info('Recommendation cache rebuilt')
+        except Exception as e:
+            app.logger.error(f'Failed to rebuild recommendation cache: {e}')
+
+
 def run_reminders_now():
     """Manually trigger the reminder job.
     
@@ -1,10 +1,18 @@
 """Application configuration."""
 import os
 from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool, StaticPool
 
 load_dotenv()
 
 
+# SQLAlchemy engine options shared by every configuration; copy before extending
+ENGINE_OPTIONS = {
+    # Rows per batched INSERT for executemany-style bulk inserts
+    'insertmanyvalues_page_size': 1000
+}
+
+
 class Config:
     """Base configuration."""
     
@@ -14,6 +22,9 @@ class Config:
     # Database
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///bookshare.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Run db.create_all() in create_app; production uses `flask init-db` instead
+    AUTO_CREATE_TABLES = os.getenv('AUTO_CREATE_TABLES', 'False').lower() == 'true'
+    SQLALCHEMY_ENGINE_OPTIONS = dict(ENGINE_OPTIONS)
     
     # SMTP Mail Configuration
     MAIL_SERVER = os.getenv('SMTP_HOST', 'localhost')
@@ -27,32 +38,65 @@ class Config:
     # Reminder Settings
     REMINDER_BEFORE_DUE = int(os.getenv('REMINDER_BEFORE_DUE', 3))
     REMINDER_AFTER_DUE = int(os.getenv('REMINDER_AFTER_DUE', 3))
+    # Threads sending reminder emails in parallel, each with its own SMTP connection
+    REMINDER_SEND_WORKERS = int(os.getenv('REMINDER_SEND_WORKERS', 8))
     
     # AI Recommendations
     RECOMMENDATIONS_TOP_K = int(os.getenv('RECOMMENDATIONS_TOP_K', 3))
-    TF_IDF_MIN_DF = int(os.getenv('TF_IDF_MIN_DF', 2))
-    TF_IDF_MAX_FEATURES = int(os.getenv('TF_IDF_MAX_FEATURES', 1000))
-    TF_IDF_NGRAM_RANGE = tuple(map(int, os.getenv('TF_IDF_NGRAM_RANGE', '1,2').split(',')))
-    RECOMMENDATION_CACHE_PATH = os.getenv('RECOMMENDATION_CACHE_PATH', 'tfidf_cache.pkl')
+    RECOMMENDATION_CACHE_PATH = os.getenv('RECOMMENDATION_CACHE_PATH', 'recommendations_cache.pkl')
+    RECOMMENDATION_REBUILD_DELAY = int(os.getenv('RECOMMENDATION_REBUILD_DELAY', 5))
+    RECOMMENDATION_RESPONSE_CACHE_TTL = int(os.getenv('RECOMMENDATION_RESPONSE_CACHE_TTL', 300))
     
     # Performance
     MAX_SEARCH_RESULTS = int(os.getenv('MAX_SEARCH_RESULTS', 100))
+    ITEMS_PER_PAGE = int(os.getenv('ITEMS_PER_PAGE', 50))
+    STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', 30))
+    AUTOCOMPLETE_CACHE_TTL = int(os.getenv('AUTOCOMPLETE_CACHE_TTL', 30))
+    SETTINGS_CACHE_TTL = int(os.getenv('SETTINGS_CACHE_TTL', 60))
+    
+    # Reject request bodies (e.g. CSV imports) larger than this, in bytes
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
 
 
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
+    AUTO_CREATE_TABLES = True
 
 
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
+    
+    # Serverless (e.g. Vercel) containers are short-lived, so don't hold a local
+    # pool; point DATABASE_URL at an external pooler such as pgbouncer instead
+    if os.getenv('DB_NULLPOOL', os.getenv('VERCEL', '')).lower() in ('1', 'true'):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            **Config.SQLALCHEMY_ENGINE_OPTIONS,
+            'poolclass': NullPool,
+            'pool_pre_ping': False
+        }
+        # sslmode is a libpq option; other drivers reject it as a connect kwarg
+        if Config.SQLALCHEMY_DATABASE_URI.startswith('postgresql'):
+            SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = {'sslmode': 'require'}
 
 
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # One shared connection keeps the in-memory database alive across threads
+    # and lets tests wrap all app work in a transaction they roll back
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **ENGINE_OPTIONS,
+        'poolclass': StaticPool,
+        'connect_args': {'check_same_thread': False}
+    }
+    AUTO_CREATE_TABLES = True
+    STATS_CACHE_TTL = 0
+    AUTOCOMPLETE_CACHE_TTL = 0
+    SETTINGS_CACHE_TTL = 0
+    RECOMMENDATION_RESPONSE_CACHE_TTL = 0
 
 
 config = {
@@ -1,5 +1,7 @@
 """Pytest configuration."""
 import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import scoped_session, sessionmaker
 from app import create_app, db as _db
 from app.models import Book, Borrower, Loan
 
@@ -11,14 +13,41 @@ def app():
     return app
 
 
-@pytest.fixture(scope='function')
-def db(app):
-    """Create database for testing."""
+@pytest.fixture(scope='session')
+def connection(app):
+    """Open the connection every test runs on; tables are created once."""
     with app.app_context():
         _db.create_all()
-        yield _db
-        _db.session.remove()
-        _db.drop_all()
+        connection = _db.engine.connect()
+        # pysqlite defers BEGIN until the first write, which breaks SAVEPOINT
+        # nesting, so emit BEGIN explicitly as the SQLAlchemy docs recommend
+        connection.connection.driver_connection.isolation_level = None
+        event.listen(connection, 'begin', lambda conn: conn.exec_driver_sql('BEGIN'))
+        yield connection
+        connection.close()
+
+
+@pytest.fixture(scope='function')
+def db(app, connection):
+    """Run each test in a transaction that is rolled back afterwards.
+    
+    Commits made by the code under test only release a savepoint, so no
+    test pays for dropping and recreating the schema.
+    """
+    with app.app_context():
+        transaction = connection.begin()
+        app_session = _db.session
+        _db.session = scoped_session(sessionmaker(
+            bind=connection,
+            join_transaction_mode='create_savepoint',
+            query_cls=_db.Query
+        ))
+        try:
+            yield _db
+        finally:
+            _db.session.remove()
+            _db.session = app_session
+            transaction.rollback()
 
 
 @pytest.fixture
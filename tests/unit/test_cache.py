@@ -0,0 +1,27 @@
+"""Unit tests for the in-process TTL cache."""
+from app.utils.cache import TTLCache
+import time
+
+
+def test_ttl_cache_expiry():
+    """Test that entries expire after their TTL."""
+    cache = TTLCache()
+    cache.set('key', 'value', ttl=0.05)
+    
+    assert cache.get('key') == 'value'
+    time.sleep(0.06)
+    assert cache.get('key') is None
+
+
+def test_ttl_cache_disabled_and_eviction():
+    """Test zero TTL skips caching and maxsize bounds the cache."""
+    cache = TTLCache(maxsize=2)
+    cache.set('skipped', 'value', ttl=0)
+    assert cache.get('skipped') is None
+    
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key, ttl=60)
+    
+    assert cache.get('a') is None
+    assert cache.get('b') == 'b'
+    assert cache.get('c') == 'c'
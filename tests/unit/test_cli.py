@@ -0,0 +1,52 @@
+"""Unit tests for CLI helpers."""
+from sqlalchemy import create_engine, inspect, text
+from app import db
+from app.utils.cli import upgrade_schema
+
+# Tables as created before active_loan_id and the partial loan indexes existed
+PRE_UPGRADE_SCHEMA = (
+    'CREATE TABLE books (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, '
+    'author VARCHAR(200) NOT NULL, isbn VARCHAR(13) UNIQUE, year INTEGER, '
+    'genre VARCHAR(100), description TEXT, created_at DATETIME)',
+    'CREATE TABLE borrowers (id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, '
+    'email VARCHAR(200) NOT NULL UNIQUE, phone VARCHAR(20), created_at DATETIME)',
+    'CREATE TABLE loans (id INTEGER PRIMARY KEY, '
+    'book_id INTEGER NOT NULL REFERENCES books (id), '
+    'borrower_id INTEGER NOT NULL REFERENCES borrowers (id), '
+    'loaned_at DATETIME NOT NULL, due_at DATETIME NOT NULL, returned_at DATETIME)',
+)
+
+
+def test_upgrade_schema_closes_duplicate_active_loans(tmp_path):
+    """Test that upgrading keeps only the newest active loan per book."""
+    engine = create_engine(f'sqlite:///{tmp_path / "old.db"}')
+    with engine.begin() as connection:
+        for statement in PRE_UPGRADE_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text(
+            "INSERT INTO books (id, title, author) VALUES (1, 'Old Book', 'Old Author')"
+        ))
+        connection.execute(text(
+            "INSERT INTO borrowers (id, name, email) VALUES (1, 'Reader', 'r@example.com')"
+        ))
+        connection.execute(text(
+            "INSERT INTO loans (id, book_id, borrower_id, loaned_at, due_at) VALUES "
+            "(1, 1, 1, '2024-01-01', '2024-01-15'), (2, 1, 1, '2024-02-01', '2024-02-15')"
+        ))
+    
+    db.metadata.create_all(engine)
+    upgrade_schema(engine)
+    # A second run finds nothing left to change
+    upgrade_schema(engine)
+    
+    with engine.connect() as connection:
+        active = connection.execute(text(
+            'SELECT id FROM loans WHERE returned_at IS NULL'
+        )).scalars().all()
+    indexes = {index['name'] for index in inspect(engine).get_indexes('loans')}
+    columns = {column['name'] for column in inspect(engine).get_columns('books')}
+    engine.dispose()
+    
+    assert active == [2]
+    assert 'uniq_active_loan' in indexes
+    assert 'active_loan_id' in columns
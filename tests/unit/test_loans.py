@@ -0,0 +1,24 @@
+"""Unit tests for loan routes."""
+from app.models import Loan
+
+
+def test_create_loan_unknown_book(client, db, sample_borrower):
+    """Test that a loan for a missing book is rejected, not inserted."""
+    response = client.post('/loans/new', data={
+        'book_id': 99999,
+        'borrower_id': sample_borrower.id
+    })
+    
+    assert response.status_code == 404
+    assert Loan.query.count() == 0
+
+
+def test_create_loan_book_already_on_loan(client, db, sample_book, sample_borrower):
+    """Test that a second active loan for a book is flashed, not raised."""
+    data = {'book_id': sample_book.id, 'borrower_id': sample_borrower.id}
+    
+    assert client.post('/loans/new', data=data).status_code == 302
+    response = client.post('/loans/new', data=data, follow_redirects=True)
+    
+    assert b'already on loan' in response.data
+    assert Loan.query.count() == 1
@@ -1,4 +1,5 @@
 """Unit tests for AI recommendation engine."""
+from sqlalchemy import insert
 from app.models import Book
 from app.services.recommendations import RecommendationEngine
 import time
@@ -178,18 +179,16 @@ def test_similar_books_score_higher(db):
 
 def test_recommendation_performance(db):
     """Test that recommendations are computed quickly."""
-    # Create 100 books
-    books = []
-    for i in range(100):
-        books.append(Book(
+    # Create 100 books in one bulk INSERT, getting the persisted Books back
+    books = db.session.scalars(insert(Book).returning(Book, sort_by_parameter_order=True), [
+        dict(
             title=f'Book {i}',
             author=f'Author {i % 10}',
             genre=['Fiction', 'Science Fiction', 'Fantasy'][i % 3],
             description=f'This is a book about topic {i % 20}'
-        ))
-    
-    for book in books:
-        db.session.add(book)
+        )
+        for i in range(100)
+    ]).all()
     db.session.commit()
     
     # Build engine
@@ -213,3 +212,105 @@ def test_recommendation_performance(db):
     
     # Verify we got recommendations
     assert len(recommendations) == 3
+
+
+def test_borrower_recommendations(db, sample_borrower):
+    """Test that borrower recommendations follow reading history."""
+    from app.models import Loan
+    from datetime import datetime, timedelta
+    
+    books = [
+        Book(title='Dune', author='Frank Herbert', genre='Science Fiction'),
+        Book(title='Dune Messiah', author='Frank Herbert', genre='Science Fiction'),
+        Book(title='Foundation', author='Isaac Asimov', genre='Science Fiction'),
+        Book(title='Emma', author='Jane Austen', genre='Romance')
+    ]
+    db.session.add_all(books)
+    db.session.commit()
+    db.session.add(Loan(
+        book_id=books[0].id,
+        borrower_id=sample_borrower.id,
+        due_at=datetime.utcnow() + timedelta(days=14),
+        returned_at=datetime.utcnow()
+    ))
+    db.session.commit()
+    
+    engine = RecommendationEngine()
+    engine.build_model()
+    recommendations = engine.get_recommendations_for_borrower(sample_borrower.id, top_k=5)
+    
+    # Same author and genre ranks first; the book already read is excluded
+    assert [rec_id for rec_id, score, source in recommendations] == [books[1].id, books[2].id]
+
+
+def test_recommendation_cache_roundtrip(db, tmp_path):
+    """Test that a saved model loads back with identical recommendations."""
+    books = [
+        Book(title='Dune', author='Frank Herbert', genre='Science Fiction',
+             description='Desert planet politics and giant sandworms'),
+        Book(title='Dune Messiah', author='Frank Herbert', genre='Science Fiction'),
+        Book(title='Foundation', author='Isaac Asimov', genre='Science Fiction',
+             description='Galactic empire politics and psychohistory'),
+        Book(title='Emma', author='Jane Austen', genre='Romance')
+    ]
+    db.session.add_all(books)
+    db.session.commit()
+    
+    engine = RecommendationEngine()
+    engine.build_model()
+    cache_path = tmp_path / 'recommendations.pkl'
+    engine.save_cache(cache_path)
+    
+    loaded = RecommendationEngine()
+    assert loaded.load_cache(cache_path) is True
+    assert loaded.build_id == engine.build_id
+    assert loaded.get_recommendations(books[0].id, top_k=3) == \
+        engine.get_recommendations(books[0].id, top_k=3)
+    
+    assert RecommendationEngine().load_cache(tmp_path / 'missing.pkl') is False
+
+
+def test_large_top_k_is_capped(db):
+    """Test that an oversized top_k neither exceeds nor grows the memo."""
+    from app.services.recommendations import NEIGHBORS_CACHED
+    
+    books = db.session.scalars(insert(Book).returning(Book, sort_by_parameter_order=True), [
+        dict(title=f'Book {i}', author='Same Author', genre='Fiction')
+        for i in range(NEIGHBORS_CACHED + 10)
+    ]).all()
+    db.session.commit()
+    
+    engine = RecommendationEngine()
+    engine.build_model()
+    recommendations = engine.get_recommendations(books[0].id, top_k=10000)
+    
+    assert len(recommendations) == NEIGHBORS_CACHED
+    assert len(engine.top_neighbors[books[0].id]) == NEIGHBORS_CACHED
+
+
+def test_unknown_book_does_not_rebuild(db, sample_book):
+    """Test that a book missing from the model is not rebuilt in place."""
+    engine = RecommendationEngine()
+    engine.build_model()
+    build_id = engine.build_id
+    
+    assert engine.get_recommendations(sample_book.id + 1) == []
+    assert engine.build_id == build_id
+
+
+def test_rebuild_without_scheduler_resets_engine(db, sample_book):
+    """Test that the inline fallback resets the engine instead of building it."""
+    from app.services import recommendations
+    from app.utils.scheduler_config import schedule_recommendation_rebuild
+    
+    engine = recommendations.get_recommendation_engine()
+    
+    assert schedule_recommendation_rebuild() is False
+    assert recommendations._recommendation_engine is None
+    
+    rebuilt = recommendations.get_recommendation_engine()
+    assert rebuilt is not engine
+    assert sample_book.id in rebuilt.book_id_to_idx
+    
+    # Don't leave an engine built from rolled-back rows for later tests
+    recommendations.reset_recommendation_engine()
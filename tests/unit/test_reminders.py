@@ -175,3 +175,62 @@ def test_notification_model_relationships(db, sample_book, sample_borrower):
     assert notif_dict['loan_id'] == loan.id
     assert notif_dict['kind'] == 'before_due'
     assert notif_dict['status'] == 'pending'
+
+
+def test_process_reminders(db, sample_book, sample_borrower, app):
+    """Test that a reminder run sends each due reminder once."""
+    from app import mail
+    
+    loan = Loan(
+        book_id=sample_book.id,
+        borrower_id=sample_borrower.id,
+        loaned_at=datetime.utcnow() - timedelta(days=20),
+        due_at=datetime.utcnow() - timedelta(days=5)
+    )
+    db.session.add(loan)
+    db.session.commit()
+    
+    with mail.record_messages() as outbox:
+        stats = ReminderScheduler.process_reminders()
+        
+        assert stats['after_due'] == 1
+        assert stats['failed'] == 0
+        assert outbox[0].recipients == [sample_borrower.email]
+        assert Notification.query.filter_by(loan_id=loan.id, status='sent').count() == 1
+        
+        # Already-sent reminders are not repeated on the next run
+        stats = ReminderScheduler.process_reminders()
+        assert stats['after_due'] == 0
+        assert len(outbox) == 1
+
+
+def test_send_batch_reopens_connection_after_failure(app, monkeypatch):
+    """Test that one failed send doesn't fail the rest of a worker's batch."""
+    from app import mail
+    
+    class DroppingConnection:
+        """SMTP connection that dies on its first failed send."""
+        opened = 0
+        
+        def __enter__(self):
+            DroppingConnection.opened += 1
+            self.dead = False
+            return self
+        
+        def __exit__(self, *exc_info):
+            if self.dead:
+                raise ConnectionError('connection already closed')
+        
+        def send(self, message):
+            if self.dead or message.recipients == ['bad@example.com']:
+                self.dead = True
+                raise ConnectionError('connection dropped')
+    
+    monkeypatch.setattr(mail, 'connect', DroppingConnection)
+    reminders = [
+        (loan_id, 'after_due', to, 'Overdue', 'Please return your book')
+        for loan_id, to in enumerate(['a@example.com', 'bad@example.com', 'c@example.com'])
+    ]
+    
+    assert ReminderScheduler._send_batch(app, reminders) == [True, False, True]
+    assert DroppingConnection.opened == 2
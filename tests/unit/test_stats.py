@@ -0,0 +1,23 @@
+"""Unit tests for dashboard statistics."""
+from app.models import Loan
+from app.services.stats import get_library_stats
+from datetime import datetime, timedelta
+
+
+def test_library_stats(db, sample_book, sample_borrower):
+    """Test that all dashboard counts are computed correctly."""
+    db.session.add(Loan(
+        book_id=sample_book.id,
+        borrower_id=sample_borrower.id,
+        due_at=datetime.utcnow() - timedelta(days=1)
+    ))
+    db.session.commit()
+    
+    stats = get_library_stats()
+    
+    assert stats == {
+        'total_books': 1,
+        'total_borrowers': 1,
+        'active_loans': 1,
+        'overdue_loans': 1
+    }